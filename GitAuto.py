@@ -1,13 +1,43 @@
 import os
 import re
+import signal
+import hashlib
+import multiprocessing
+import shutil
 import subprocess
+import tempfile
 import threading
+import time
 import json
+from concurrent.futures import ProcessPoolExecutor, as_completed
 import customtkinter as ctk
 from tkinter import filedialog, messagebox
 
 CONFIG_FILE = os.path.expanduser("~/.autogit_config.json")
+SNAPSHOT_REF_PREFIX = "refs/gitauto/snapshots/"
+SNAPSHOT_KEEP = 20
+PUSH_RETRY_BASE = 15
+PUSH_RETRY_MAX = 15 * 60
+# Give up on a push whose transfer stalls, not on one that is merely slow
+PUSH_STALL_CONFIG = ["-c", "http.lowSpeedLimit=1000", "-c", "http.lowSpeedTime=60"]
+PUSH_SSH_COMMAND = "ssh -o ConnectTimeout=30 -o ServerAliveInterval=15 -o ServerAliveCountMax=4"
+# Push failures that mean the setup is wrong rather than the network being down
+PUSH_CONFIG_ERRORS = (
+    "No configured push destination",
+    "has no upstream branch",
+    "Authentication failed",
+    "Permission denied",
+    "Host key verification failed",
+    "could not read Username",
+    "could not read Password",
+    "terminal prompts disabled",
+    "The requested URL returned error",
+)
+CHECK_TIMEOUT = 10 * 60
+CHECK_CACHE_KEEP = 50
 context_menu_open = False
+config_lock = threading.RLock()
+push_locks = {}
 
 def load_config():
     if os.path.exists(CONFIG_FILE):
@@ -19,10 +49,182 @@ def load_config():
     return {}
 
 def save_config(data):
-    with open(CONFIG_FILE, "w") as f:
-        json.dump(data, f)
+    # Swap in a complete file so a crash mid-write never loses the config
+    with config_lock:
+        fd, temp_path = tempfile.mkstemp(prefix=".autogit_config.", dir=os.path.dirname(CONFIG_FILE))
+        try:
+            with os.fdopen(fd, "w") as f:
+                json.dump(data, f)
+            os.replace(temp_path, CONFIG_FILE)
+        except Exception:
+            if os.path.exists(temp_path):
+                os.remove(temp_path)
+            raise
+
+def create_snapshot(repo_path, label, include_untracked=True, target=None):
+    # Record HEAD, the index and the working tree as a commit under refs/gitauto/
+    # without touching the working tree or the real index. target is where the
+    # operation is about to move HEAD; None means it leaves HEAD alone
+    head = subprocess.run(["git", "rev-parse", "--verify", "-q", "HEAD"], cwd=repo_path,
+                          capture_output=True,
+                          creationflags=subprocess.CREATE_NO_WINDOW if os.name == 'nt' else 0)
+    if head.returncode != 0:
+        return None
+    head = head.stdout.decode().strip()
+    branch = get_current_branch(repo_path)
+    head_after = head
+    if target:
+        resolved = subprocess.run(["git", "rev-parse", "--verify", "-q", f"{target}^{{commit}}"], cwd=repo_path,
+                                  capture_output=True,
+                                  creationflags=subprocess.CREATE_NO_WINDOW if os.name == 'nt' else 0)
+        head_after = resolved.stdout.decode().strip() if resolved.returncode == 0 else ""
+    unmerged = subprocess.run(["git", "ls-files", "-u"], cwd=repo_path, capture_output=True, check=True,
+                              creationflags=subprocess.CREATE_NO_WINDOW if os.name == 'nt' else 0).stdout.strip()
+    # An unmerged index cannot be written as a tree; keep only HEAD and the worktree then
+    parents = ["-p", head]
+    if not unmerged:
+        index_tree = subprocess.run(["git", "write-tree"], cwd=repo_path, capture_output=True, check=True,
+                                    creationflags=subprocess.CREATE_NO_WINDOW if os.name == 'nt' else 0).stdout.decode().strip()
+        index_commit = subprocess.run(["git", "commit-tree", index_tree, "-p", head, "-m", f"index: {label}"],
+                                      cwd=repo_path, capture_output=True, check=True,
+                                      creationflags=subprocess.CREATE_NO_WINDOW if os.name == 'nt' else 0).stdout.decode().strip()
+        parents += ["-p", index_commit]
+    index_path = subprocess.run(["git", "rev-parse", "--git-path", "index"], cwd=repo_path,
+                                capture_output=True, check=True,
+                                creationflags=subprocess.CREATE_NO_WINDOW if os.name == 'nt' else 0).stdout.decode().strip()
+    index_path = os.path.join(repo_path, index_path)
+    # Stage the working tree into a throwaway copy of the index so stat info is reused
+    fd, temp_index = tempfile.mkstemp(prefix="gitauto-index-")
+    os.close(fd)
+    try:
+        if os.path.exists(index_path):
+            shutil.copyfile(index_path, temp_index)
+        else:
+            os.remove(temp_index)
+        env = dict(os.environ, GIT_INDEX_FILE=temp_index)
+        subprocess.run(["git", "add", "-A" if include_untracked else "-u", "--", "."], cwd=repo_path, env=env,
+                       capture_output=True, check=True,
+                       creationflags=subprocess.CREATE_NO_WINDOW if os.name == 'nt' else 0)
+        worktree_tree = subprocess.run(["git", "write-tree"], cwd=repo_path, env=env,
+                                       capture_output=True, check=True,
+                                       creationflags=subprocess.CREATE_NO_WINDOW if os.name == 'nt' else 0).stdout.decode().strip()
+    finally:
+        if os.path.exists(temp_index):
+            os.remove(temp_index)
+    snapshot = subprocess.run(["git", "commit-tree", worktree_tree, *parents, "-m", label,
+                               "-m", f"branch: {branch}\nhead-after: {head_after}"],
+                              cwd=repo_path, capture_output=True, check=True,
+                              creationflags=subprocess.CREATE_NO_WINDOW if os.name == 'nt' else 0).stdout.decode().strip()
+    ref = f"{SNAPSHOT_REF_PREFIX}{int(time.time() * 1000):015d}"
+    subprocess.run(["git", "update-ref", "-m", f"gitauto: {label}", ref, snapshot], cwd=repo_path,
+                   capture_output=True, check=True,
+                   creationflags=subprocess.CREATE_NO_WINDOW if os.name == 'nt' else 0)
+    prune_snapshots(repo_path)
+    return ref
+
+def snapshot_before(repo_path, label, include_untracked=True, target=None):
+    # A failed snapshot must never block the operation the user asked for
+    try:
+        return create_snapshot(repo_path, label, include_untracked, target)
+    except (subprocess.CalledProcessError, OSError):
+        return None
+
+def get_current_branch(repo_path):
+    # Full ref name such as refs/heads/main, or "" when HEAD is detached
+    result = subprocess.run(["git", "symbolic-ref", "-q", "HEAD"], cwd=repo_path, capture_output=True,
+                            creationflags=subprocess.CREATE_NO_WINDOW if os.name == 'nt' else 0)
+    return result.stdout.decode().strip()
+
+def get_current_head(repo_path):
+    result = subprocess.run(["git", "rev-parse", "--verify", "-q", "HEAD"], cwd=repo_path, capture_output=True,
+                            creationflags=subprocess.CREATE_NO_WINDOW if os.name == 'nt' else 0)
+    return result.stdout.decode().strip()
+
+def get_snapshot_info(repo_path, ref):
+    # branch and head_after are None for snapshots that predate those fields
+    result = subprocess.run(["git", "log", "-1", "--pretty=%b", ref], cwd=repo_path, capture_output=True, check=True,
+                            creationflags=subprocess.CREATE_NO_WINDOW if os.name == 'nt' else 0)
+    info = {'branch': None, 'head_after': None}
+    for line in result.stdout.decode().split('\n'):
+        key, _, value = line.partition(":")
+        if key == "branch":
+            info['branch'] = value.strip()
+        elif key == "head-after":
+            info['head_after'] = value.strip()
+    head = subprocess.run(["git", "log", "-1", "--pretty=%h %s", f"{ref}^1"], cwd=repo_path, capture_output=True,
+                          check=True, creationflags=subprocess.CREATE_NO_WINDOW if os.name == 'nt' else 0)
+    info['head'] = head.stdout.decode().strip()
+    millis = int(ref[len(SNAPSHOT_REF_PREFIX):])
+    info['time'] = time.strftime("%Y-%m-%d %H:%M:%S", time.localtime(millis / 1000))
+    return info
+
+def list_snapshots(repo_path):
+    # Newest first; ref names are zero-padded millisecond timestamps
+    result = subprocess.run(["git", "for-each-ref", "--sort=-refname", "--format=%(refname)|%(subject)",
+                             SNAPSHOT_REF_PREFIX], cwd=repo_path, capture_output=True, check=True,
+                            creationflags=subprocess.CREATE_NO_WINDOW if os.name == 'nt' else 0)
+    snapshots = []
+    for line in result.stdout.decode().strip().split('\n'):
+        if line:
+            ref, _, subject = line.partition('|')
+            snapshots.append({'ref': ref, 'label': subject})
+    return snapshots
+
+def prune_snapshots(repo_path, keep=SNAPSHOT_KEEP):
+    for snap in list_snapshots(repo_path)[keep:]:
+        subprocess.run(["git", "update-ref", "-d", snap['ref']], cwd=repo_path, capture_output=True, check=True,
+                       creationflags=subprocess.CREATE_NO_WINDOW if os.name == 'nt' else 0)
+
+def restore_snapshot(repo_path, ref, current=None):
+    # Move HEAD back, check out the saved working tree, then put the saved index back.
+    # current is a snapshot of the state being replaced; files it has that ref lacks
+    # are removed even when untracked, so restoring current afterwards is exact
+    removed = []
+    if current:
+        diff = subprocess.run(["git", "diff-tree", "-r", "-z", "--name-only", "--diff-filter=D", current, ref],
+                              cwd=repo_path, capture_output=True, check=True,
+                              creationflags=subprocess.CREATE_NO_WINDOW if os.name == 'nt' else 0)
+        removed = [path for path in diff.stdout.decode().split('\0') if path]
+    subprocess.run(["git", "reset", "-q", "--hard", f"{ref}^1"], cwd=repo_path, capture_output=True, check=True,
+                   creationflags=subprocess.CREATE_NO_WINDOW if os.name == 'nt' else 0)
+    subprocess.run(["git", "read-tree", "-u", "--reset", ref], cwd=repo_path, capture_output=True, check=True,
+                   creationflags=subprocess.CREATE_NO_WINDOW if os.name == 'nt' else 0)
+    # Snapshots taken with an unmerged index have no index parent; HEAD's tree is the best we can do
+    has_index = subprocess.run(["git", "rev-parse", "-q", "--verify", f"{ref}^2"], cwd=repo_path,
+                               capture_output=True,
+                               creationflags=subprocess.CREATE_NO_WINDOW if os.name == 'nt' else 0).returncode == 0
+    subprocess.run(["git", "read-tree", f"{ref}^2" if has_index else f"{ref}^1"], cwd=repo_path,
+                   capture_output=True, check=True,
+                   creationflags=subprocess.CREATE_NO_WINDOW if os.name == 'nt' else 0)
+    for path in removed:
+        full_path = os.path.join(repo_path, path)
+        if os.path.isfile(full_path) or os.path.islink(full_path):
+            os.remove(full_path)
+            try:
+                os.removedirs(os.path.dirname(full_path))
+            except OSError:
+                pass
+    subprocess.run(["git", "update-ref", "-d", ref], cwd=repo_path, capture_output=True, check=True,
+                   creationflags=subprocess.CREATE_NO_WINDOW if os.name == 'nt' else 0)
+
+def undo_last_operation(repo_path, snapshot, status_update, show_error_popup, include_untracked=True):
+    def worker():
+        try:
+            status_update("Undoing last operation...", "#FF9800")
+            # Undo is destructive too, so keep the current state; undoing again redoes
+            current = create_snapshot(repo_path, "Before undo", include_untracked, f"{snapshot['ref']}^1")
+            restore_snapshot(repo_path, snapshot['ref'], current)
+            status_update(f"↩️ Undone: {snapshot['label']}", "#00C853")
+        except subprocess.CalledProcessError as err:
+            status_update("Undo failed", "#E53935")
+            err_text = err.stderr.decode() if getattr(err, 'stderr', None) else str(err)
+            show_error_popup("Undo Error", f"Failed to restore snapshot:\n{err_text}")
+        except Exception as err:
+            status_update("Undo failed", "#E53935")
+            show_error_popup("Undo Error", f"Unexpected error:\n{str(err)}")
+    threading.Thread(target=worker, daemon=True).start()
 
-def revert_to_last_published(repo_path, status_update, show_error_popup):
+def revert_to_last_published(repo_path, status_update, show_error_popup, include_untracked=True):
     def worker():
         try:
             status_update("Reverting to last published...", "#FF9800")
@@ -34,6 +236,7 @@ def revert_to_last_published(repo_path, status_update, show_error_popup):
                 ], cwd=repo_path, capture_output=True, text=True, check=True,
                 creationflags=subprocess.CREATE_NO_WINDOW if os.name == 'nt' else 0)
             upstream = result.stdout.strip()
+            saved = snapshot_before(repo_path, "Revert to last published", include_untracked, upstream)
             # Reset hard to the upstream (last published)
             subprocess.run(["git", "reset", "--hard", upstream], cwd=repo_path, check=True,
                           creationflags=subprocess.CREATE_NO_WINDOW if os.name == 'nt' else 0)
@@ -45,7 +248,7 @@ def revert_to_last_published(repo_path, status_update, show_error_popup):
                 ], cwd=repo_path, capture_output=True, text=True, check=True,
                 creationflags=subprocess.CREATE_NO_WINDOW if os.name == 'nt' else 0)
             last_published_msg = msg.stdout.strip().split('\n')[0] if msg.stdout else "Last successful commit"
-            status_update(f"✅ {last_published_msg}", "#00C853")
+            status_update(f"✅ {last_published_msg}" + ("" if saved else " (no undo snapshot)"), "#00C853")
         except subprocess.CalledProcessError as err:
             status_update("Revert failed", "#E53935")
             err_text = err.stderr.decode() if getattr(err, 'stderr', None) else str(err)
@@ -55,6 +258,168 @@ def revert_to_last_published(repo_path, status_update, show_error_popup):
             show_error_popup("Revert Error", f"Unexpected error:\n{str(err)}")
     threading.Thread(target=worker, daemon=True).start()
 
+def is_remote_reachable(repo_path):
+    try:
+        subprocess.run(["git", "ls-remote", "--heads", "-q"], cwd=repo_path, capture_output=True, check=True,
+                       timeout=30, env=dict(os.environ, GIT_TERMINAL_PROMPT="0"),
+                       creationflags=subprocess.CREATE_NO_WINDOW if os.name == 'nt' else 0)
+        return True
+    except (subprocess.CalledProcessError, subprocess.TimeoutExpired):
+        return False
+
+def is_offline_push_error(repo_path, stderr):
+    if any(pattern in stderr for pattern in PUSH_CONFIG_ERRORS):
+        return False
+    remotes = subprocess.run(["git", "remote"], cwd=repo_path, capture_output=True,
+                             creationflags=subprocess.CREATE_NO_WINDOW if os.name == 'nt' else 0).stdout.strip()
+    if not remotes:
+        return False
+    return not is_remote_reachable(repo_path)
+
+def get_push_lock(repo_path):
+    # Serialises the Push button and the queued retry for one repo
+    with config_lock:
+        return push_locks.setdefault(repo_path, threading.Lock())
+
+def git_push_command(repo_path):
+    command = ["git", *PUSH_STALL_CONFIG]
+    # Only add connect/keepalive limits when the user has no ssh command of their own
+    user_ssh = subprocess.run(["git", "config", "core.sshCommand"], cwd=repo_path, capture_output=True,
+                              creationflags=subprocess.CREATE_NO_WINDOW if os.name == 'nt' else 0).stdout.strip()
+    if not (user_ssh or os.environ.get("GIT_SSH_COMMAND") or os.environ.get("GIT_SSH")):
+        command += ["-c", f"core.sshCommand={PUSH_SSH_COMMAND}"]
+    return command + ["push"]
+
+def get_push_queue(config, repo_path):
+    return config.get("push_queue", {}).get(repo_path)
+
+def queue_push(config, repo_path, version):
+    # The commits stay on the local branch; the queue only remembers that a push is owed
+    with config_lock:
+        entry = config.setdefault("push_queue", {}).setdefault(repo_path, {"versions": [], "attempts": 0})
+        entry["versions"].append(version)
+        entry["attempts"] = 0
+        save_config(config)
+        return len(entry["versions"])
+
+def clear_push_queue(config, repo_path):
+    with config_lock:
+        if config.get("push_queue", {}).pop(repo_path, None) is not None:
+            save_config(config)
+
+def count_push_attempt(config, repo_path):
+    with config_lock:
+        entry = get_push_queue(config, repo_path)
+        if entry:
+            entry["attempts"] += 1
+            save_config(config)
+
+def push_retry_delay(attempts):
+    return min(PUSH_RETRY_BASE * 2 ** attempts, PUSH_RETRY_MAX)
+
+def flush_push_queue(config, repo_path, status_update, show_error_popup):
+    # One push delivers every queued commit on the branch at once
+    push_lock = get_push_lock(repo_path)
+    if not push_lock.acquire(blocking=False):
+        # A Push click is already delivering; its push carries the queue too
+        return False
+    try:
+        entry = get_push_queue(config, repo_path)
+        if not entry:
+            return True
+        count = len(entry["versions"])
+        ahead = subprocess.run(["git", "rev-list", "--count", "@{u}..HEAD"], cwd=repo_path, capture_output=True,
+                               creationflags=subprocess.CREATE_NO_WINDOW if os.name == 'nt' else 0)
+        if ahead.returncode == 0 and ahead.stdout.decode().strip() == "0":
+            # The queued commits are gone (e.g. reverted), so there is nothing to deliver
+            clear_push_queue(config, repo_path)
+            status_update("Push queue cleared, nothing to push", "#9E9E9E")
+            return True
+        try:
+            status_update(f"Retrying push of {count} queued...", "#2196F3")
+            subprocess.run(git_push_command(repo_path), cwd=repo_path, capture_output=True, check=True,
+                           env=dict(os.environ, GIT_TERMINAL_PROMPT="0"),
+                           creationflags=subprocess.CREATE_NO_WINDOW if os.name == 'nt' else 0)
+        except subprocess.CalledProcessError as err:
+            err_text = err.stderr.decode(errors="replace") if err.stderr else str(err)
+            if is_offline_push_error(repo_path, err_text):
+                count_push_attempt(config, repo_path)
+                status_update(f"Push retry failed, {count} queued", "#FFB300")
+                return False
+            # The remote answered and refused; retrying will not help
+            clear_push_queue(config, repo_path)
+            status_update("Queued push rejected", "#E53935")
+            show_error_popup("Git Push Error", f"The remote rejected the {count} queued commit(s):\n\n{err_text}")
+            return False
+        clear_push_queue(config, repo_path)
+        status_update(f"✅ {count} queued commits pushed", "#00C853")
+        return True
+    finally:
+        push_lock.release()
+
+def kill_process_tree(proc):
+    # Killing only the shell leaves its children holding the output pipes open
+    if os.name == 'nt':
+        subprocess.run(["taskkill", "/F", "/T", "/PID", str(proc.pid)], capture_output=True,
+                       creationflags=subprocess.CREATE_NO_WINDOW)
+    else:
+        try:
+            os.killpg(proc.pid, signal.SIGKILL)
+        except ProcessLookupError:
+            pass
+
+def run_check(repo_path, name, command):
+    # Runs in a worker process, so it must stay at module scope
+    if os.name == 'nt':
+        proc = subprocess.Popen(command, cwd=repo_path, shell=True, stdout=subprocess.PIPE, stderr=subprocess.PIPE,
+                                creationflags=subprocess.CREATE_NO_WINDOW | subprocess.CREATE_NEW_PROCESS_GROUP)
+    else:
+        proc = subprocess.Popen(command, cwd=repo_path, shell=True, stdout=subprocess.PIPE, stderr=subprocess.PIPE,
+                                start_new_session=True)
+    try:
+        stdout, stderr = proc.communicate(timeout=CHECK_TIMEOUT)
+    except subprocess.TimeoutExpired:
+        kill_process_tree(proc)
+        proc.communicate()
+        return name, False, f"Timed out after {CHECK_TIMEOUT}s"
+    # Tools print in UTF-8 (emoji included) whatever the console codepage is
+    output = (stdout + stderr).decode("utf-8", errors="replace").strip()
+    return name, proc.returncode == 0, output
+
+def run_pre_push_checks(repo_path, config, status_update):
+    # Checks come from config["pre_push_checks"], e.g. {"lint": "flake8", "test": "pytest -q"}
+    checks = config.get("pre_push_checks") or {}
+    if not checks:
+        return []
+    tree = subprocess.run(["git", "write-tree"], cwd=repo_path, capture_output=True, text=True, check=True,
+                          creationflags=subprocess.CREATE_NO_WINDOW if os.name == 'nt' else 0).stdout.strip()
+    # Changing the configured commands must invalidate earlier passes of the same tree
+    checks_hash = hashlib.sha1(json.dumps(checks, sort_keys=True).encode()).hexdigest()[:12]
+    key = f"{tree}:{checks_hash}"
+    if key in config.get("check_cache", {}).get(repo_path, []):
+        status_update("Checks passed (cached) ✅", "#00C853")
+        return []
+    status_update(f"Running {len(checks)} checks...", "#FFB300")
+    failures = []
+    done = 0
+    with ProcessPoolExecutor(max_workers=len(checks)) as pool:
+        futures = [pool.submit(run_check, repo_path, name, command) for name, command in checks.items()]
+        for future in as_completed(futures):
+            name, ok, output = future.result()
+            done += 1
+            if ok:
+                status_update(f"Checks {done}/{len(checks)}: {name} ✅", "#FFB300")
+            else:
+                failures.append((name, output))
+                status_update(f"Checks {done}/{len(checks)}: {name} failed", "#E53935")
+    if not failures:
+        with config_lock:
+            cache = config.setdefault("check_cache", {}).setdefault(repo_path, [])
+            cache.append(key)
+            del cache[:-CHECK_CACHE_KEEP]
+            save_config(config)
+    return failures
+
 def get_latest_version(repo_path):
     try:
         result = subprocess.run(
@@ -78,23 +443,45 @@ def get_latest_version(repo_path):
     except subprocess.CalledProcessError:
         return "V-0.0.1.0"
 
-def run_git_push(repo_path, status_update, show_error_popup):
+def run_git_push(repo_path, status_update, show_error_popup, config):
     try:
         status_update("Getting version...", "#FFB300")
         new_version = get_latest_version(repo_path)
         status_update(f"Committing {new_version}", "#FFB300")
         subprocess.run(["git", "add", "."], cwd=repo_path, check=True, 
                       creationflags=subprocess.CREATE_NO_WINDOW if os.name == 'nt' else 0)
+        failures = run_pre_push_checks(repo_path, config, status_update)
+        if failures:
+            status_update(f"{len(failures)} check(s) failed, push aborted", "#E53935")
+            details = "\n\n".join(f"[{name}]\n{output[-1500:]}" for name, output in failures)
+            show_error_popup("Pre-push Checks Failed", details)
+            return
         subprocess.run(["git", "commit", "-m", new_version], cwd=repo_path, check=True,
                       creationflags=subprocess.CREATE_NO_WINDOW if os.name == 'nt' else 0)
-        subprocess.run(["git", "push"], cwd=repo_path, check=True,
-                      creationflags=subprocess.CREATE_NO_WINDOW if os.name == 'nt' else 0)
+        with get_push_lock(repo_path):
+            try:
+                subprocess.run(git_push_command(repo_path), cwd=repo_path, capture_output=True, check=True,
+                              env=dict(os.environ, GIT_TERMINAL_PROMPT="0"),
+                              creationflags=subprocess.CREATE_NO_WINDOW if os.name == 'nt' else 0)
+            except subprocess.CalledProcessError as push_err:
+                push_stderr = push_err.stderr.decode(errors="replace") if push_err.stderr else ""
+                if not is_offline_push_error(repo_path, push_stderr):
+                    raise
+                # Offline: keep the commit and let the retry loop deliver it later
+                queued = queue_push(config, repo_path, new_version)
+                status_update(f"📦 {new_version} queued ({queued} waiting)", "#FFB300")
+                return
+            clear_push_queue(config, repo_path)
         status_update(f"✅ {new_version} pushed", "#00C853")
     except subprocess.CalledProcessError as e:
         error_msg = f"Git Error:\n\n{e.stderr.decode() if e.stderr else str(e)}"
         status_update("Git error occurred", "#E53935")
         # After the user acknowledges the error, revert to the last published commit
-        show_error_popup("Git Error", error_msg, after_ok=lambda: revert_to_last_published(repo_path, status_update, show_error_popup))
+        # The revert drops any queued commits too, so forget the queue with it
+        show_error_popup("Git Error", error_msg, after_ok=lambda: [
+            clear_push_queue(config, repo_path),
+            revert_to_last_published(repo_path, status_update, show_error_popup, config.get("snapshot_untracked", True))
+        ])
     except Exception as e:
         error_msg = f"Unexpected Error:\n\n{str(e)}"
         status_update("Error occurred", "#E53935")
@@ -131,24 +518,28 @@ def main():
     def cmd_set_repo():
         path = filedialog.askdirectory(title="Select Git Repo")
         if path and os.path.isdir(os.path.join(path, ".git")):
-            config["repo_path"] = path
-            save_config(config)
+            with config_lock:
+                config["repo_path"] = path
+                save_config(config)
             repo_label.configure(text=os.path.basename(path), text_color="#FFFFFF")
             update_status("Repo saved ✅", "#00C853")
             update_button_layout()
+            schedule_push_retry()
         else:
             messagebox.showerror("Invalid Repo", "Selected folder is not a git repository.")
 
     def cmd_reset_repo():
-        if os.path.exists(CONFIG_FILE):
-            try:
-                os.remove(CONFIG_FILE)
-            except Exception:
-                pass
-        config.clear()
+        with config_lock:
+            if os.path.exists(CONFIG_FILE):
+                try:
+                    os.remove(CONFIG_FILE)
+                except Exception:
+                    pass
+            config.clear()
         repo_label.configure(text="[Not Set]", text_color="#BDBDBD")
         update_status("Repo reset", "#E53935")
         update_button_layout()
+        schedule_push_retry()
 
     def update_button_layout():
         has_repo = config.get("repo_path") and os.path.isdir(os.path.join(config["repo_path"], ".git"))
@@ -175,9 +566,35 @@ def main():
         if not repo_path or not os.path.isdir(os.path.join(repo_path, ".git")):
             messagebox.showerror("No Repo", "Set a valid repository first.")
             return
-        threading.Thread(target=lambda: run_git_push(repo_path, update_status, show_error_popup), daemon=True).start()
+        def run_push():
+            run_git_push(repo_path, update_status, show_error_popup, config)
+            root.after(0, schedule_push_retry)
+        threading.Thread(target=run_push, daemon=True).start()
         update_status("🚀 Pushing...", "#2196F3")
 
+    push_retry_job = [None]
+
+    def schedule_push_retry():
+        if push_retry_job[0] is not None:
+            root.after_cancel(push_retry_job[0])
+            push_retry_job[0] = None
+        entry = get_push_queue(config, config.get("repo_path")) if config.get("repo_path") else None
+        if not entry:
+            queue_label.pack_forget()
+            return
+        delay = push_retry_delay(entry["attempts"])
+        queue_label.configure(text=f"📦 {len(entry['versions'])} queued · retry {delay}s")
+        queue_label.pack(side="left", padx=(10, 0))
+        push_retry_job[0] = root.after(delay * 1000, retry_queued_push)
+
+    def retry_queued_push():
+        push_retry_job[0] = None
+        repo_path = config.get("repo_path")
+        def worker():
+            flush_push_queue(config, repo_path, update_status, show_error_popup)
+            root.after(0, schedule_push_retry)
+        threading.Thread(target=worker, daemon=True).start()
+
     left_frame = ctk.CTkFrame(main_frame, fg_color="transparent")
     left_frame.pack(side="left", fill="both", expand=True, padx=15, pady=2)
     repo_text = os.path.basename(config.get("repo_path", "[Not Set]"))
@@ -195,6 +612,12 @@ def main():
         text_color="#9E9E9E"
     )
     status_label.pack(side="left")
+    queue_label = ctk.CTkLabel(
+        left_frame,
+        text="",
+        font=ctk.CTkFont(size=9),
+        text_color="#FFB300"
+    )
     button_frame = ctk.CTkFrame(main_frame, fg_color="transparent")
     button_frame.pack(side="right", padx=15, pady=2)
     push_button = ctk.CTkButton(
@@ -313,17 +736,57 @@ def main():
             def run_restore():
                 try:
                     update_status("Restoring files...", "#FF9800")
+                    saved = snapshot_before(repo_path, "Git restore", config.get("snapshot_untracked", True))
                     subprocess.run(["git", "restore", "."], cwd=repo_path, check=True,
                                   creationflags=subprocess.CREATE_NO_WINDOW if os.name == 'nt' else 0)
                     subprocess.run(["git", "clean", "-fd"], cwd=repo_path, check=True,
                                   creationflags=subprocess.CREATE_NO_WINDOW if os.name == 'nt' else 0)
-                    update_status("Restore complete ✅", "#00C853")
-                    messagebox.showinfo("Git Restore", "Successfully restored to last commit!")
+                    if saved:
+                        update_status("Restore complete ✅", "#00C853")
+                        messagebox.showinfo("Git Restore", "Successfully restored to last commit!")
+                    else:
+                        update_status("Restore complete (no undo snapshot)", "#FF9800")
+                        messagebox.showinfo("Git Restore", "Successfully restored to last commit!\n\nNo undo snapshot could be saved, so this cannot be undone.")
                 except subprocess.CalledProcessError as e:
                     update_status("Restore failed", "#E53935")
                     messagebox.showerror("Git Restore Error", f"Failed to restore files:\n{e.stderr.decode() if e.stderr else str(e)}")
+                except Exception as e:
+                    update_status("Restore failed", "#E53935")
+                    messagebox.showerror("Git Restore Error", f"Unexpected error:\n{str(e)}")
             threading.Thread(target=run_restore, daemon=True).start()
 
+    def cmd_undo_last():
+        repo_path = config.get("repo_path")
+        if not repo_path or not os.path.isdir(os.path.join(repo_path, ".git")):
+            messagebox.showerror("No Repo", "Set a valid repository first.")
+            return
+        try:
+            snapshots = list_snapshots(repo_path)
+            if not snapshots:
+                update_status("Nothing to undo", "#9E9E9E")
+                return
+            snapshot = snapshots[0]
+            info = get_snapshot_info(repo_path, snapshot['ref'])
+            current_branch = get_current_branch(repo_path)
+            current_head = get_current_head(repo_path)
+        except subprocess.CalledProcessError as e:
+            messagebox.showerror("Undo Error", f"Failed to read snapshots:\n{e.stderr.decode() if e.stderr else str(e)}")
+            return
+        if info['branch'] is not None and info['branch'] != current_branch:
+            taken_on = info['branch'].replace("refs/heads/", "") or "a detached HEAD"
+            messagebox.showerror("Undo Error", f"The last snapshot was taken on {taken_on}.\n\nSwitch back to it before undoing.")
+            return
+        details = f"Snapshot: {snapshot['label']}\nTaken: {info['time']}\nRestores HEAD to: {info['head']}"
+        if info['head_after'] is not None and info['head_after'] != current_head:
+            # Commits, pulls or a missed snapshot since then; undo would rewind past them
+            if not messagebox.askyesno("Confirm Undo",
+                                       f"{details}\n\n⚠️ HEAD has moved since this snapshot was taken. Undoing will move the branch back to the commit above and drop any commits made since.\n\nUndo anyway?",
+                                       icon="warning", default="no"):
+                return
+        elif not messagebox.askyesno("Confirm Undo", f"{details}\n\nYour current state is saved as a new snapshot first, so Undo again reverses this.\n\nContinue?"):
+            return
+        undo_last_operation(repo_path, snapshot, update_status, show_error_popup, config.get("snapshot_untracked", True))
+
     def cmd_git_reset_hard():
         repo_path = config.get("repo_path")
         if not repo_path or not os.path.isdir(os.path.join(repo_path, ".git")):
@@ -577,13 +1040,22 @@ def main():
             def run_reset():
                 try:
                     update_status("Resetting to commit...", "#FF9800")
+                    saved = snapshot_before(repo_path, f"Reset to {commit_hash[:8]}", config.get("snapshot_untracked", True),
+                                            commit_hash)
                     subprocess.run(["git", "reset", "--hard", commit_hash], cwd=repo_path, check=True,
                                   creationflags=subprocess.CREATE_NO_WINDOW if os.name == 'nt' else 0)
-                    update_status("Reset complete ✅", "#00C853")
-                    messagebox.showinfo("Git Reset", f"Successfully reset to commit {commit_hash[:8]}...")
+                    if saved:
+                        update_status("Reset complete ✅", "#00C853")
+                        messagebox.showinfo("Git Reset", f"Successfully reset to commit {commit_hash[:8]}...")
+                    else:
+                        update_status("Reset complete (no undo snapshot)", "#FF9800")
+                        messagebox.showinfo("Git Reset", f"Successfully reset to commit {commit_hash[:8]}...\n\nNo undo snapshot could be saved, so this cannot be undone.")
                 except subprocess.CalledProcessError as e:
                     update_status("Reset failed", "#E53935")
                     messagebox.showerror("Git Reset Error", f"Failed to reset to commit:\n{e.stderr.decode() if e.stderr else str(e)}")
+                except Exception as e:
+                    update_status("Reset failed", "#E53935")
+                    messagebox.showerror("Git Reset Error", f"Unexpected error:\n{str(e)}")
             threading.Thread(target=run_reset, daemon=True).start()
 
     def show_context_menu(event):
@@ -597,7 +1069,7 @@ def main():
         context_window.configure(fg_color="#1E1E1E")
         menu_x = event.x_root
         menu_y = event.y_root
-        context_window.geometry(f"180x180+{menu_x}+{menu_y}")
+        context_window.geometry(f"180x205+{menu_x}+{menu_y}")
         menu_frame = ctk.CTkFrame(context_window, fg_color="#1E1E1E", corner_radius=8)
         menu_frame.pack(fill="both", expand=True, padx=1, pady=1)
         header_label = ctk.CTkLabel(
@@ -657,6 +1129,18 @@ def main():
             command=lambda: [close_context_menu(), cmd_git_reset_hard()]
         )
         reset_btn.pack(pady=1)
+        undo_btn = ctk.CTkButton(
+            menu_frame,
+            text="↩️ Undo Last Operation",
+            width=160,
+            height=20,
+            corner_radius=10,
+            font=ctk.CTkFont(size=9, weight="bold"),
+            fg_color="#424242",
+            hover_color="#636363",
+            command=lambda: [close_context_menu(), cmd_undo_last()]
+        )
+        undo_btn.pack(pady=1)
         separator2 = ctk.CTkFrame(menu_frame, height=1, fg_color="#404040")
         separator2.pack(fill="x", padx=8, pady=3)
         close_btn = ctk.CTkButton(
@@ -707,6 +1191,7 @@ def main():
     reset_button.bind("<Button-3>", show_context_menu)
     repo_label.bind("<Button-3>", show_context_menu)
     status_label.bind("<Button-3>", show_context_menu)
+    queue_label.bind("<Button-3>", show_context_menu)
 
     if config.get("repo_path"):
         repo_label.configure(text=os.path.basename(config["repo_path"]), text_color="#FFFFFF")
@@ -716,7 +1201,9 @@ def main():
         update_status("Set repo to start", "#9E9E9E")
     
     update_button_layout()
+    schedule_push_retry()
     root.mainloop()
 
 if __name__ == "__main__":
+    multiprocessing.freeze_support()
     main()